@@ -1,6 +1,11 @@
-from fastapi import FastAPI, HTTPException
-from typing import Dict, Optional
+from fastapi import FastAPI, HTTPException, Query
+from typing import Dict, List, Optional, Tuple
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import anyio
+import asyncio
+import math
 import os
 from dotenv import load_dotenv
 
@@ -10,10 +15,20 @@ from services.dependency_service import DependencyService
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # CPU-bound analysis runs in the threadpool, so allow more than the
+    # default 40 threads to keep up with concurrent requests
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 100
+    yield
+    # Release pooled GitHub connections
+    await github_service.close()
+
 app = FastAPI(
     title="Git Repository Intelligence Hub",
     description="AI-powered repository analysis",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 origin = os.getenv("FRONTEND_URL")
 
@@ -30,11 +45,43 @@ github_service = GitHubService()
 analysis_service = AnalysisService()
 dependency_service = DependencyService()
 
+async def _fetch_tree_and_dependencies(owner: str, repo: str) -> Tuple[Dict, Dict]:
+    """
+    Fetch the repository tree, then only the package files it lists.
+    Failures fall back to an empty tree and an empty dependency analysis.
+    """
+    try:
+        tree = await github_service.get_tree(owner, repo)
+    except Exception:
+        tree = {}
+    try:
+        dependencies = await dependency_service.analyze_dependencies(
+            github_service, owner, repo, tree=tree
+        )
+    except Exception:
+        dependencies = dependency_service.empty_analysis()
+    return tree, dependencies
+
+def _analyze_overview(languages: Dict, commits: List[Dict], readme: Optional[str],
+                      tree: Dict) -> Tuple[Dict, Dict, Optional[Dict], Dict]:
+    """Run all /analyze computations together, for a single threadpool hop"""
+    return (
+        analysis_service.analyze_languages(languages),
+        analysis_service.analyze_commits(commits),
+        analysis_service.analyze_readme(readme),
+        analysis_service.analyze_file_structure(tree)
+    )
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Git Repository Intelligence Hub is running!"}
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """GitHub response cache statistics"""
+    return github_service.cache.stats()
+
 @app.get("/analyze/{owner}/{repo}")
 async def analyze_repository(owner: str, repo: str) -> Dict:
     """
@@ -46,22 +93,29 @@ async def analyze_repository(owner: str, repo: str) -> Dict:
     - Code structure and README analysis
     """
     try:
-        # Fetch basic repository data
-        repo_data = await github_service.get_repository(owner, repo)
-        languages = await github_service.get_languages(owner, repo)
-        commits = await github_service.get_commits(owner, repo, per_page=100)
-        readme = await github_service.get_readme(owner, repo)
-        tree = await github_service.get_tree(owner, repo)
-        
-        # Perform analysis
-        language_analysis = analysis_service.analyze_languages(languages)
-        commit_analysis = analysis_service.analyze_commits(commits)
-        readme_analysis = analysis_service.analyze_readme(readme)
-        structure_analysis = analysis_service.analyze_file_structure(tree)
-        dependency_analysis = await dependency_service.analyze_dependencies(
-            github_service, owner, repo
+        # Fetch repository data concurrently; repository info, languages,
+        # commits and README come back from a single GraphQL request, while
+        # the tree and the package files it lists are fetched alongside
+        overview, tree_and_dependencies = await asyncio.gather(
+            github_service.get_repository_overview(owner, repo),
+            _fetch_tree_and_dependencies(owner, repo),
+            return_exceptions=True
         )
 
+        # Without the repository itself there is nothing to analyze
+        if isinstance(overview, Exception):
+            raise overview
+
+        repo_data = overview['repository']
+        languages = overview['languages']
+        commits = overview['commits']
+        readme = overview['readme']
+        tree, dependency_analysis = tree_and_dependencies
+
+        # Perform analysis off the event loop
+        language_analysis, commit_analysis, readme_analysis, structure_analysis = \
+            await run_in_threadpool(_analyze_overview, languages, commits, readme, tree)
+
         return {
             "repository": {
                 "name": repo_data.get('name'),
@@ -89,13 +143,19 @@ async def analyze_repository(owner: str, repo: str) -> Dict:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.get("/commit-analysis/{owner}/{repo}")
-async def detailed_commit_analysis(owner: str, repo: str, limit: int = 200):
+async def detailed_commit_analysis(owner: str, repo: str, limit: int = Query(200, ge=1, le=1000)):
     """
     Detailed commit analysis with categorization and patterns
     """
     try:
-        commits = await github_service.get_commits(owner, repo, per_page=limit)
-        analysis = analysis_service.analyze_commits(commits)
+        # GitHub returns at most 100 commits per page, so fetch pages concurrently
+        pages = math.ceil(limit / 100)
+        results = await asyncio.gather(*(
+            github_service.get_commits(owner, repo, per_page=100, page=page)
+            for page in range(1, pages + 1)
+        ))
+        commits = [commit for page in results for commit in page][:limit]
+        analysis = await run_in_threadpool(analysis_service.analyze_commits, commits)
         
         return {
             "repository": f"{owner}/{repo}",
@@ -131,7 +191,7 @@ async def code_quality_analysis(owner: str, repo: str):
     """
     try:
         tree = await github_service.get_tree(owner, repo)
-        structure = analysis_service.analyze_file_structure(tree)
+        structure = await run_in_threadpool(analysis_service.analyze_file_structure, tree)
         
         # Basic quality metrics based on file structure
         quality_score = 0
@@ -232,10 +292,17 @@ async def get_file_content(owner: str, repo: str, path: str):
 
 
 if __name__ == "__main__":
+    # For production behind gunicorn use:
+    #   gunicorn main:app -k uvicorn.workers.UvicornWorker -w 4
+    import sys
     import uvicorn
     uvicorn.run(
         "main:app", 
         host="0.0.0.0", 
         port=8000, 
-        reload=True
+        # uvloop is not available on Windows
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("WORKERS", "4")),
+        reload=os.getenv("RELOAD", "false").lower() == "true"
     )
@@ -1,10 +1,46 @@
 from typing import Dict, List, Optional
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
+from functools import lru_cache
+import os
 import re
 import json
+import numpy as np
+
+# Shared read-only default for missing nested objects in API payloads
+_EMPTY: Dict = {}
+
+@lru_cache(maxsize=4096)
+def _weekday(date_str: str) -> str:
+    """Day-of-week name for an ISO 8601 timestamp"""
+    return datetime.fromisoformat(date_str.replace('Z', '+00:00')).strftime('%A')
 
 class AnalysisService:
+    # Conventional commit prefix, e.g. "fix: ..." or "feat(api): ..."
+    _CAT_RE = re.compile(
+        r"^\s*(feat|feature|fix|bug|hotfix|docs|doc|style|format|refactor|refact"
+        r"|test|tests|chore|build|ci)\s*[:\(]"
+    )
+    # Every README marker we look for, matched in one scan of the lowercased text
+    _README_RE = re.compile(
+        r"install|setup|getting started|usage|example|how to|contribut|license|!\["
+    )
+    _README_SECTIONS = {
+        "install": "installation", "setup": "installation", "getting started": "installation",
+        "usage": "usage", "example": "usage", "how to": "usage",
+        "contribut": "contributing",
+        "license": "license",
+        "![": "badges"
+    }
+    _KW2CAT = {
+        "feat": "feat", "feature": "feat",
+        "fix": "fix", "bug": "fix", "hotfix": "fix",
+        "docs": "docs", "doc": "docs",
+        "style": "style", "format": "style",
+        "refactor": "refactor", "refact": "refactor",
+        "test": "test", "tests": "test",
+        "chore": "chore", "build": "chore", "ci": "chore"
+    }
     
     def analyze_commits(self, commits: List[Dict]) -> Dict:
         """Analyze commit patterns and categorize them"""
@@ -24,60 +60,43 @@ class AnalysisService:
         }
         
         author_stats = Counter()
-        commit_dates = []
+        unique_days = set()
+        frequency = defaultdict(int)
+        cat_re = self._CAT_RE
+        kw2cat = self._KW2CAT
+        weekday = _weekday
 
         for commit in commits:
-            message = commit.get('commit', {}).get('message', '').lower()
-            author = commit.get('commit', {}).get('author', {}).get('name', 'Unknown')
-            date_str = commit.get('commit', {}).get('author', {}).get('date')
+            c = commit.get('commit') or _EMPTY
+            a = c.get('author') or _EMPTY
+            message = c.get('message', '').lower()
+            author = a.get('name', 'Unknown')
+            date_str = a.get('date')
             
             # Categorize commit
-            if any(keyword in message for keyword in ['feat:', 'feature:']):
-                categories['feat'] += 1
-            elif any(keyword in message for keyword in ['fix:', 'bug:', 'hotfix:']):
-                categories['fix'] += 1
-            elif any(keyword in message for keyword in ['docs:', 'doc:']):
-                categories['docs'] += 1
-            elif any(keyword in message for keyword in ['style:', 'format:']):
-                categories['style'] += 1
-            elif any(keyword in message for keyword in ['refactor:', 'refact:']):
-                categories['refactor'] += 1
-            elif any(keyword in message for keyword in ['test:', 'tests:']):
-                categories['test'] += 1
-            elif any(keyword in message for keyword in ['chore:', 'build:', 'ci:']):
-                categories['chore'] += 1
-            else:
-                categories['others'] += 1
+            match = cat_re.match(message)
+            categories[kw2cat.get(match.group(1), 'others') if match else 'others'] += 1
 
             author_stats[author] += 1
             if date_str:
-                commit_dates.append(date_str)
+                # Track active days and day-of-week frequency in the same pass
+                unique_days.add(date_str[:10])
+                try:
+                    frequency[weekday(date_str)] += 1
+                except ValueError:
+                    pass
 
-        # Calculate commit frequency
-        frequency = self._calculate_commit_frequency(commit_dates)
-        avg_per_day = len(commits) / max(len(set(date[:10] for date in commit_dates)), 1)
+        avg_per_day = len(commits) / max(len(unique_days), 1)
 
         return {
             "total_commits": len(commits),
             "commit_categories": categories,
             "top_authors": [{"name": name, "commit_count": count} 
                           for name, count in author_stats.most_common(10)],
-            "commit_frequency": frequency,
+            "commit_frequency": dict(frequency),
             "avg_commits_per_day": round(avg_per_day, 2)
         }
 
-    def _calculate_commit_frequency(self, dates: List[str]) -> Dict[str, int]:
-        """Calculate commit frequency by day of week"""
-        frequency = defaultdict(int)
-        for date_str in dates:
-            try:
-                date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                day_name = date.strftime('%A')
-                frequency[day_name] += 1
-            except:
-                continue
-        return dict(frequency)
-
     def analyze_languages(self, languages: Dict[str, int]) -> Dict:
         """Analyze programming languages usage"""
         if not languages:
@@ -87,13 +106,13 @@ class AnalysisService:
                 "language_percentage": {}
             }
 
-        total_bytes = sum(languages.values())
-        percentages = {
-            lang: round((bytes_count / total_bytes) * 100, 2)
-            for lang, bytes_count in languages.items()
-        }
-        
-        primary_language = max(languages.items(), key=lambda x: x[1])[0] if languages else "Unknown"
+        keys = list(languages)
+        vals = np.fromiter(languages.values(), dtype=np.float64, count=len(keys))
+        total_bytes = vals.sum()
+        pct = np.round(vals * (100.0 / total_bytes), 2) if total_bytes else np.zeros_like(vals)
+        percentages = dict(zip(keys, pct.tolist()))
+
+        primary_language = keys[int(vals.argmax())]
 
         return {
             "languages": languages,
@@ -109,15 +128,13 @@ class AnalysisService:
         lines = readme_content.split('\n')
         headers = [line for line in lines if line.startswith('#')]
         
-        # Count different sections
+        # Detect sections in a single pass over the content
+        section_names = self._README_SECTIONS
+        lowered = readme_content.lower()
+        found = {section_names[m.group(0)] for m in self._README_RE.finditer(lowered)}
         sections = {
-            "installation": any(word in readme_content.lower() 
-                              for word in ['install', 'setup', 'getting started']),
-            "usage": any(word in readme_content.lower() 
-                        for word in ['usage', 'example', 'how to']),
-            "contributing": 'contribut' in readme_content.lower(),
-            "license": 'license' in readme_content.lower(),
-            "badges": readme_content.count('![') > 0 or readme_content.count('[![') > 0
+            name: name in found
+            for name in ("installation", "usage", "contributing", "license", "badges")
         }
 
         return {
@@ -134,18 +151,21 @@ class AnalysisService:
         if not tree or 'tree' not in tree:
             return {"file_count": 0, "directory_count": 0, "file_types": {}}
 
-        files = tree['tree']
-        file_count = sum(1 for f in files if f['type'] == 'blob')
-        dir_count = sum(1 for f in files if f['type'] == 'tree')
-        
+        file_count = 0
+        dir_count = 0
+        exts = []
+        splitext = os.path.splitext
+
+        for f in tree['tree']:
+            t = f.get('type')
+            if t == 'blob':
+                file_count += 1
+                exts.append(splitext(f['path'])[1])
+            elif t == 'tree':
+                dir_count += 1
+
         # Analyze file types
-        file_types = Counter()
-        for file in files:
-            if file['type'] == 'blob':
-                path = file['path']
-                if '.' in path:
-                    ext = path.split('.')[-1].lower()
-                    file_types[ext] += 1
+        file_types = Counter(ext.lower().lstrip('.') for ext in exts if ext)
 
         return {
             "file_count": file_count,
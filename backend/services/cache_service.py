@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+import orjson
+import redis.asyncio as redis
+from cachetools import LRUCache
+from redis.exceptions import RedisError
+
+# With a shared tier, entries younger than this are served from process
+# memory without checking Redis for a newer copy
+L1_MAX_AGE = 60
+# How long Redis keeps an entry past its TTL, so the stale copy's ETag
+# is still there for a conditional request
+L2_STALE_GRACE = 600
+# Seconds to wait on Redis before treating it as unavailable
+L2_TIMEOUT = 0.5
+# Weight of the probabilistic early refresh; higher refreshes earlier
+EARLY_REFRESH_BETA = 1.0
+
+class CacheEntry(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: Any
+    inserted_at: float
+    ttl: int
+    # Seconds the origin fetch took, used to schedule early refreshes
+    delta: float = 0.0
+
+class CacheService:
+    """
+    Two-tier cache for GitHub API responses: an in-process LRU (L1) backed
+    by an optional Redis tier (L2) shared across workers and restarts
+    """
+
+    def __init__(self, maxsize: int = 2048, ttl: int = 300, redis_url: Optional[str] = None):
+        self.default_ttl = ttl
+        # Expired entries are kept (until evicted) so their validators can be
+        # used for conditional requests
+        self._cache = LRUCache(maxsize=maxsize)
+        self._lock = asyncio.Lock()
+        self._redis = redis.from_url(
+            redis_url, socket_connect_timeout=L2_TIMEOUT, socket_timeout=L2_TIMEOUT
+        ) if redis_url else None
+        self.hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    async def close(self):
+        """Close the Redis connection pool, if any"""
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    @staticmethod
+    def make_key(endpoint: str, owner: str, repo: str, params: Optional[Dict] = None) -> str:
+        """Build a cache key like gh:v1:{endpoint}:{owner}/{repo}:{params_hash}"""
+        params_hash = hashlib.sha1(
+            json.dumps(params or {}, sort_keys=True).encode()
+        ).hexdigest()[:12]
+        return f"gh:v1:{endpoint}:{owner}/{repo}:{params_hash}"
+
+    @staticmethod
+    def is_fresh(entry: CacheEntry) -> bool:
+        """
+        Whether entry can be served without refetching. Entries close to
+        expiry are refreshed early at random (XFetch), so concurrent
+        requests don't all miss at the same instant.
+        """
+        early = entry.delta * EARLY_REFRESH_BETA * -math.log(1.0 - random.random())
+        return time.time() + early < entry.inserted_at + entry.ttl
+
+    async def get(self, key: str) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Return (entry, fresh) for key. A stale entry is still returned so
+        its validators can be used; entry is None if absent from both tiers.
+        """
+        async with self._lock:
+            entry = self._cache.get(key)
+
+        if entry is not None and self.is_fresh(entry) and (
+            self._redis is None or time.time() - entry.inserted_at < L1_MAX_AGE
+        ):
+            self.hits += 1
+            return entry, True
+
+        shared = await self._l2_get(key)
+        if shared is not None and (entry is None or shared.inserted_at > entry.inserted_at):
+            entry = shared
+            async with self._lock:
+                self._cache[key] = entry
+
+        fresh = entry is not None and self.is_fresh(entry)
+        if fresh:
+            self.hits += 1
+            if entry is shared:
+                self.l2_hits += 1
+        else:
+            self.misses += 1
+        return entry, fresh
+
+    async def set(self, key: str, body: Any, ttl: Optional[int] = None,
+                  etag: Optional[str] = None, last_modified: Optional[str] = None,
+                  delta: float = 0.0):
+        """Store body under key for ttl seconds along with its validators"""
+        entry = CacheEntry(etag, last_modified, body, time.time(), ttl or self.default_ttl, delta)
+        async with self._lock:
+            self._cache[key] = entry
+        await self._l2_set(key, entry)
+
+    async def touch(self, key: str):
+        """Restart the TTL of an entry GitHub confirmed unchanged"""
+        async with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return
+            entry = entry._replace(inserted_at=time.time())
+            self._cache[key] = entry
+            self.revalidations += 1
+        await self._l2_set(key, entry)
+
+    async def _l2_get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Read an entry from Redis; Redis being unavailable or holding a value
+        that is not a cache entry counts as a miss
+        """
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(key)
+            return CacheEntry(**orjson.loads(raw)) if raw else None
+        except (RedisError, TypeError, ValueError):
+            return None
+
+    async def _l2_set(self, key: str, entry: CacheEntry):
+        """Write an entry to Redis, ignoring Redis being unavailable"""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(
+                key, orjson.dumps(entry._asdict()), ex=entry.ttl + L2_STALE_GRACE
+            )
+        except RedisError:
+            pass
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current occupancy"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "shared_tier": self._redis is not None
+        }
@@ -1,12 +1,15 @@
-import json
+import asyncio
+import orjson
 import re
 from typing import Dict, List, Optional
+from lxml import etree
+from packaging.requirements import InvalidRequirement, Requirement
 
 class DependencyService:
     
-    async def analyze_dependencies(self, github_service, owner: str, repo: str) -> Dict:
-        """Analyze project dependencies from various package managers"""
-        dependencies = {
+    def empty_analysis(self) -> Dict:
+        """Result shape for a repository with no recognised package files"""
+        return {
             "package_managers": [],
             "total_dependencies": 0,
             "dependencies": {},
@@ -14,6 +17,14 @@ class DependencyService:
             "outdated_dependencies": []
         }
 
+    async def analyze_dependencies(self, github_service, owner: str, repo: str,
+                                   tree: Optional[Dict] = None) -> Dict:
+        """
+        Analyze project dependencies from various package managers.
+        Pass the repository tree if it has already been fetched.
+        """
+        dependencies = self.empty_analysis()
+
         # Check for different package manager files
         package_files = {
             "package.json": self._analyze_npm_dependencies,
@@ -26,9 +37,28 @@ class DependencyService:
             "go.mod": self._analyze_go_dependencies
         }
 
-        for filename, analyzer in package_files.items():
-            content = await github_service.get_file_content(owner, repo, filename)
-            if content:
+        if tree is None:
+            tree = await github_service.get_tree(owner, repo)
+
+        # Only fetch the package files the tree says exist. Without a complete
+        # tree (a truncated listing can omit root files), probe every one of them
+        if tree and 'tree' in tree and not tree.get('truncated'):
+            present = {
+                item['path'] for item in tree['tree']
+                if item.get('type') == 'blob' and item.get('path') in package_files
+            }
+            package_files = {
+                filename: analyzer for filename, analyzer in package_files.items()
+                if filename in present
+            }
+
+        contents = await asyncio.gather(
+            *(github_service.get_file_content(owner, repo, filename) for filename in package_files),
+            return_exceptions=True
+        )
+
+        for (filename, analyzer), content in zip(package_files.items(), contents):
+            if content and not isinstance(content, Exception):
                 result = analyzer(content)
                 if result:
                     dependencies["package_managers"].append(filename)
@@ -42,7 +72,7 @@ class DependencyService:
     def _analyze_npm_dependencies(self, content: str) -> Optional[Dict]:
         """Analyze package.json dependencies"""
         try:
-            data = json.loads(content)
+            data = orjson.loads(content)
             deps = data.get("dependencies", {})
             dev_deps = data.get("devDependencies", {})
             
@@ -52,25 +82,27 @@ class DependencyService:
                 "scripts": data.get("scripts", {}),
                 "version": data.get("version", "unknown")
             }
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return None
 
     def _analyze_python_dependencies(self, content: str) -> Optional[Dict]:
         """Analyze requirements.txt dependencies"""
-        lines = content.strip().split('\n')
+        # Join backslash continuations, as in hash-pinned pip-compile output
+        lines = re.sub(r'\\\r?\n', ' ', content).strip().split('\n')
         dependencies = {}
         
         for line in lines:
-            line = line.strip()
+            # Drop inline comments; "#" without leading whitespace can be part of a URL
+            line = re.split(r'\s+#', line, maxsplit=1)[0]
+            # Drop per-requirement pip options such as --hash
+            line = line.split(' --', 1)[0].strip()
             if line and not line.startswith('#'):
-                # Parse package==version or package>=version format
-                match = re.match(r'^([a-zA-Z0-9\-_]+)([>=<!=]+)(.+)$', line)
-                if match:
-                    package, operator, version = match.groups()
-                    dependencies[package] = f"{operator}{version}"
-                else:
-                    # Simple package name without version
-                    dependencies[line] = "latest"
+                try:
+                    req = Requirement(line)
+                except InvalidRequirement:
+                    # -e, -r, bare URLs and other pip options
+                    continue
+                dependencies[req.name] = str(req.specifier) or "latest"
         
         return {"dependencies": dependencies} if dependencies else None
 
@@ -109,14 +141,30 @@ class DependencyService:
     def _analyze_maven_dependencies(self, content: str) -> Optional[Dict]:
         """Analyze Maven pom.xml dependencies"""
         dependencies = {}
-        
-        # Simple regex to find dependencies (this is basic, XML parsing would be better)
-        dep_pattern = r'<dependency>.*?<groupId>(.*?)</groupId>.*?<artifactId>(.*?)</artifactId>.*?<version>(.*?)</version>.*?</dependency>'
-        matches = re.findall(dep_pattern, content, re.DOTALL)
-        
-        for group_id, artifact_id, version in matches:
-            package_name = f"{group_id}:{artifact_id}"
-            dependencies[package_name] = version.strip()
+
+        # pom.xml comes from untrusted repositories, so never resolve entities
+        parser = etree.XMLParser(resolve_entities=False, no_network=True)
+        try:
+            root = etree.fromstring(content.encode('utf-8'), parser)
+        except etree.XMLSyntaxError:
+            return None
+
+        # POMs normally declare the Maven namespace on the root element
+        if root.tag.startswith('{'):
+            ns = {"m": root.tag[1:].split('}', 1)[0]}
+            prefix = "m:"
+        else:
+            ns = {}
+            prefix = ""
+
+        for dep in root.iterfind(f".//{prefix}dependency", ns):
+            group_id = dep.findtext(f"{prefix}groupId", namespaces=ns)
+            artifact_id = dep.findtext(f"{prefix}artifactId", namespaces=ns)
+            if not group_id or not artifact_id:
+                continue
+            version = dep.findtext(f"{prefix}version", namespaces=ns)
+            package_name = f"{group_id.strip()}:{artifact_id.strip()}"
+            dependencies[package_name] = version.strip() if version else "latest"
         
         return {"dependencies": dependencies} if dependencies else None
 
@@ -150,7 +198,7 @@ class DependencyService:
     def _analyze_composer_dependencies(self, content: str) -> Optional[Dict]:
         """Analyze PHP composer.json dependencies"""
         try:
-            data = json.loads(content)
+            data = orjson.loads(content)
             deps = data.get("require", {})
             dev_deps = data.get("require-dev", {})
             
@@ -158,7 +206,7 @@ class DependencyService:
                 "dependencies": deps,
                 "dev_dependencies": dev_deps
             }
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return None
 
     def _analyze_go_dependencies(self, content: str) -> Optional[Dict]:
@@ -169,18 +217,25 @@ class DependencyService:
         in_require = False
         
         for line in lines:
-            line = line.strip()
+            # Drop comments such as "// indirect"
+            line = line.split('//', 1)[0].strip()
+            if not line:
+                continue
             if line.startswith('require ('):
                 in_require = True
                 continue
             elif line == ')' and in_require:
                 in_require = False
                 continue
+            elif line.startswith(('module ', 'go ', 'toolchain ')):
+                continue
             elif in_require or line.startswith('require '):
                 # Parse "module version" format
-                parts = line.replace('require ', '').split()
+                parts = line.split()
+                if parts[0] == 'require':
+                    parts = parts[1:]
                 if len(parts) >= 2:
-                    module, version = parts, parts[1]
+                    module, version = parts[0], parts[1]
                     dependencies[module] = version
         
         return {"dependencies": dependencies} if dependencies else None
@@ -1,9 +1,69 @@
 import httpx
+import asyncio
 import base64
 import os
-from typing import Dict, List, Optional
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from cachetools import LRUCache
 from fastapi import HTTPException
 
+from services.cache_service import CacheService
+
+# Seconds each kind of GitHub response is served from the cache
+CACHE_TTLS = {
+    "repository": 600,
+    "languages": 3600,
+    "commits": 120,
+    "readme": 900,
+    "contents": 900,
+    "contributors": 600,
+    "issues": 120,
+    "tree": 900,
+    "overview": 120
+}
+
+# Retries after a rate-limit response, and the longest single wait between them
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_MAX_WAIT = 60
+
+# Repository metadata, languages, latest commits and README in one request
+REPOSITORY_OVERVIEW_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    name
+    nameWithOwner
+    description
+    stargazerCount
+    forkCount
+    issues(states: OPEN) { totalCount }
+    pullRequests(states: OPEN) { totalCount }
+    licenseInfo { name }
+    createdAt
+    updatedAt
+    diskUsage
+    primaryLanguage { name }
+    languages(first: 100, orderBy: {field: SIZE, direction: DESC}) {
+      edges { size node { name } }
+    }
+    defaultBranchRef {
+      name
+      target {
+        ... on Commit {
+          history(first: 100) {
+            nodes { message author { name email date } }
+          }
+        }
+      }
+    }
+    readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+    readmeRst: object(expression: "HEAD:README.rst") { ... on Blob { text } }
+    readmePlain: object(expression: "HEAD:README") { ... on Blob { text } }
+  }
+}
+"""
+
 class GitHubService:
     def __init__(self):
         self.api_url = "https://api.github.com"
@@ -12,89 +72,301 @@ class GitHubService:
             "Authorization": f"token {self.token}",
             "Accept": "application/vnd.github.v3+json"
         } if self.token else {"Accept": "application/vnd.github.v3+json"}
+        # One pooled HTTP/2 client for the lifetime of the app, so requests
+        # share connections instead of paying a TCP+TLS handshake each
+        self._client = httpx.AsyncClient(
+            base_url=self.api_url,
+            headers=self.headers,
+            http2=True,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        )
+        # Set REDIS_URL to share cached responses across workers and restarts
+        self.cache = CacheService(maxsize=2048, ttl=300, redis_url=os.getenv("REDIS_URL"))
+        # Decoded file contents keyed by blob sha; content-addressed, so never stale
+        self._blob_cache = LRUCache(maxsize=512)
+        # Cap in-flight GitHub requests to stay under the secondary rate limits
+        self._sem = asyncio.Semaphore(int(os.getenv("GH_MAX_CONCURRENCY", "10")))
+
+    async def close(self):
+        """Close the underlying HTTP client and cache connections"""
+        await self._client.aclose()
+        await self.cache.close()
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Send a request with bounded concurrency, retrying with backoff when
+        GitHub reports a rate limit (429, or 403 with no quota left)
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            async with self._sem:
+                response = await self._client.request(method, path, **kwargs)
+            if attempt == RATE_LIMIT_RETRIES or not self._is_rate_limited(response):
+                return response
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                # The limit resets too far out for a retry to succeed
+                return response
+            # Sleep outside the semaphore so other requests can proceed
+            await asyncio.sleep(delay)
+        return response
+
+    @staticmethod
+    def _is_rate_limited(response: httpx.Response) -> bool:
+        """Whether response is a primary or secondary rate-limit rejection"""
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            response.headers.get("X-RateLimit-Remaining") == "0"
+            or "Retry-After" in response.headers
+        )
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a rate-limited request, or None if
+        GitHub asks us to wait longer than RATE_LIMIT_MAX_WAIT
+        """
+        delay = 2 ** attempt
+        retry_after = response.headers.get("Retry-After")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        elif reset and reset.isdigit():
+            delay = max(delay, int(reset) - time.time())
+        return delay if delay <= RATE_LIMIT_MAX_WAIT else None
+
+    async def _get(self, endpoint: str, owner: str, repo: str, path: str,
+                   params: Optional[Dict] = None) -> Tuple[int, Any]:
+        """
+        GET a GitHub API path, serving successful responses from the cache.
+        Expired entries are revalidated with a conditional request, which
+        GitHub answers with a 304 that does not count against the rate limit.
+        Returns (status_code, parsed JSON) on success and
+        (status_code, response text) otherwise.
+        """
+        key = self.cache.make_key(endpoint, owner, repo, {"path": path, **(params or {})})
+        entry, fresh = await self.cache.get(key)
+        if fresh:
+            return 200, entry.body
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        started = time.monotonic()
+        response = await self._request("GET", path, params=params, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            await self.cache.touch(key)
+            return 200, entry.body
+        if response.status_code != 200:
+            return response.status_code, response.text
+
+        body = response.json()
+        await self.cache.set(
+            key, body, CACHE_TTLS.get(endpoint),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            delta=time.monotonic() - started
+        )
+        return 200, body
+
+    def _decode_content(self, data: Dict) -> str:
+        """Base64-decode a contents API payload, reusing earlier decodes of the same blob"""
+        sha = data.get('sha')
+        if sha and sha in self._blob_cache:
+            return self._blob_cache[sha]
+        content = base64.b64decode(data['content']).decode('utf-8')
+        if sha:
+            self._blob_cache[sha] = content
+        return content
+
+    async def graphql(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """Run a GitHub GraphQL query and return its data"""
+        response = await self._request(
+            "POST", "/graphql", json={"query": query, "variables": variables or {}}
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"GraphQL request failed: {response.text}"
+            )
+        payload = response.json()
+        if payload.get('errors') and not payload.get('data'):
+            raise HTTPException(status_code=502, detail=f"GraphQL errors: {payload['errors']}")
+        return payload.get('data') or {}
+
+    async def get_repository_overview(self, owner: str, repo: str) -> Dict:
+        """
+        Get repository info, languages, the latest 100 commits and the README
+        in a single GraphQL request, mapped to the REST response shapes:
+        {"repository": ..., "languages": ..., "commits": ..., "readme": ...}
+        """
+        # The GraphQL API is only available to authenticated clients
+        if not self.token:
+            return await self._get_repository_overview_rest(owner, repo)
+
+        key = self.cache.make_key("overview", owner, repo)
+        entry, fresh = await self.cache.get(key)
+        if fresh:
+            return entry.body
+
+        started = time.monotonic()
+        data = await self.graphql(REPOSITORY_OVERVIEW_QUERY, {"owner": owner, "name": repo})
+        repository = data.get('repository')
+        if not repository:
+            raise HTTPException(status_code=404, detail=f"Repository not found: {owner}/{repo}")
+
+        overview = self._map_repository_overview(repository)
+        if overview['readme'] is None:
+            # The aliases only cover common root names; REST /readme also finds
+            # other spellings and READMEs under docs/ or .github/
+            overview['readme'] = await self.get_readme(owner, repo)
+        await self.cache.set(
+            key, overview, CACHE_TTLS["overview"], delta=time.monotonic() - started
+        )
+        return overview
+
+    def _map_repository_overview(self, repository: Dict) -> Dict:
+        """Convert a GraphQL repository node into REST-shaped data"""
+        default_branch = repository.get('defaultBranchRef') or {}
+        history = (default_branch.get('target') or {}).get('history') or {}
+        open_prs = (repository.get('pullRequests') or {}).get('totalCount', 0)
+        open_issues = (repository.get('issues') or {}).get('totalCount', 0)
+
+        repo_data = {
+            "name": repository.get('name'),
+            "full_name": repository.get('nameWithOwner'),
+            "description": repository.get('description'),
+            "stargazers_count": repository.get('stargazerCount', 0),
+            "forks_count": repository.get('forkCount', 0),
+            # REST counts open pull requests as issues
+            "open_issues_count": open_issues + open_prs,
+            # REST reports the star count as watchers_count
+            "watchers_count": repository.get('stargazerCount', 0),
+            "license": repository.get('licenseInfo'),
+            "default_branch": default_branch.get('name'),
+            "created_at": repository.get('createdAt'),
+            "updated_at": repository.get('updatedAt'),
+            "size": repository.get('diskUsage') or 0,
+            "language": (repository.get('primaryLanguage') or {}).get('name')
+        }
+
+        languages = {
+            edge['node']['name']: edge['size']
+            for edge in (repository.get('languages') or {}).get('edges', [])
+        }
+
+        commits = []
+        for node in history.get('nodes') or []:
+            author = dict(node.get('author') or {})
+            if author.get('date'):
+                # GraphQL keeps the committer's offset; REST reports UTC
+                author['date'] = datetime.fromisoformat(
+                    author['date'].replace('Z', '+00:00')
+                ).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            commits.append({"commit": {"message": node.get('message', ''), "author": author}})
+
+        readme = None
+        for alias in ('readme', 'readmeLower', 'readmeRst', 'readmePlain'):
+            blob = repository.get(alias)
+            if blob and blob.get('text') is not None:
+                readme = blob['text']
+                break
+
+        return {
+            "repository": repo_data,
+            "languages": languages,
+            "commits": commits,
+            "readme": readme
+        }
+
+    async def _get_repository_overview_rest(self, owner: str, repo: str) -> Dict:
+        """REST fallback for get_repository_overview when no token is set"""
+        repo_data, languages, commits, readme = await asyncio.gather(
+            self.get_repository(owner, repo),
+            self.get_languages(owner, repo),
+            self.get_commits(owner, repo, per_page=100),
+            self.get_readme(owner, repo),
+            return_exceptions=True
+        )
+        if isinstance(repo_data, Exception):
+            raise repo_data
+
+        return {
+            "repository": repo_data,
+            "languages": {} if isinstance(languages, Exception) else languages,
+            "commits": [] if isinstance(commits, Exception) else commits,
+            "readme": None if isinstance(readme, Exception) else readme
+        }
 
     async def get_repository(self, owner: str, repo: str) -> Dict:
         """Get basic repository information"""
-        url = f"{self.api_url}/repos/{owner}/{repo}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code, 
-                    detail=f"Repository not found: {response.text}"
-                )
-            return response.json()
+        status, data = await self._get("repository", owner, repo, f"/repos/{owner}/{repo}")
+        if status != 200:
+            raise HTTPException(
+                status_code=status, 
+                detail=f"Repository not found: {data}"
+            )
+        return data
 
     async def get_languages(self, owner: str, repo: str) -> Dict[str, int]:
         """Get programming languages used in repository"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/languages"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            return response.json() if response.status_code == 200 else {}
+        status, data = await self._get("languages", owner, repo, f"/repos/{owner}/{repo}/languages")
+        return data if status == 200 else {}
 
     async def get_commits(self, owner: str, repo: str, per_page: int = 100, page: int = 1) -> List[Dict]:
-        """Get repository commits"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/commits"
-        params = {"per_page": per_page, "page": page}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail="Failed to fetch commits"
-                )
-            return response.json()
+        """Get one page of repository commits (GitHub caps pages at 100)"""
+        params = {"per_page": min(per_page, 100), "page": page}
+        status, data = await self._get("commits", owner, repo, f"/repos/{owner}/{repo}/commits", params)
+        if status != 200:
+            raise HTTPException(
+                status_code=status,
+                detail="Failed to fetch commits"
+            )
+        return data
 
     async def get_readme(self, owner: str, repo: str) -> Optional[str]:
         """Get repository README content"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/readme"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            if response.status_code != 200:
-                return None
-            data = response.json()
-            try:
-                content = base64.b64decode(data['content']).decode('utf-8')
-                return content
-            except Exception:
-                return None
+        status, data = await self._get("readme", owner, repo, f"/repos/{owner}/{repo}/readme")
+        if status != 200:
+            return None
+        try:
+            return self._decode_content(data)
+        except Exception:
+            return None
 
     async def get_file_content(self, owner: str, repo: str, path: str) -> Optional[str]:
-        url = f"{self.api_url}/repos/{owner}/{repo}/contents/{path}"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            if response.status_code != 200:
-                return None
-            data = response.json()
-            
-            if 'content' in data and data['encoding'] == 'base64':
-                try:
-                    content = base64.b64decode(data['content']).decode('utf-8')
-                    return content
-                except UnicodeDecodeError:
-                    # Handle binary files
-                    return f"[Binary file - {data.get('size', 0)} bytes]"
+        status, data = await self._get("contents", owner, repo, f"/repos/{owner}/{repo}/contents/{path}")
+        if status != 200:
             return None
+        
+        if 'content' in data and data['encoding'] == 'base64':
+            try:
+                return self._decode_content(data)
+            except UnicodeDecodeError:
+                # Handle binary files
+                return f"[Binary file - {data.get('size', 0)} bytes]"
+        return None
 
 
     async def get_contributors(self, owner: str, repo: str) -> List[Dict]:
         """Get repository contributors"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/contributors"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            return response.json() if response.status_code == 200 else []
+        status, data = await self._get("contributors", owner, repo, f"/repos/{owner}/{repo}/contributors")
+        return data if status == 200 else []
 
     async def get_issues(self, owner: str, repo: str, state: str = "all") -> List[Dict]:
         """Get repository issues"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/issues"
         params = {"state": state, "per_page": 100}
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers, params=params)
-            return response.json() if response.status_code == 200 else []
+        status, data = await self._get("issues", owner, repo, f"/repos/{owner}/{repo}/issues", params)
+        return data if status == 200 else []
 
     async def get_tree(self, owner: str, repo: str, sha: str = "HEAD") -> Dict:
         """Get repository file tree"""
-        url = f"{self.api_url}/repos/{owner}/{repo}/git/trees/{sha}?recursive=1"
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=self.headers)
-            return response.json() if response.status_code == 200 else {}
+        status, data = await self._get(
+            "tree", owner, repo, f"/repos/{owner}/{repo}/git/trees/{sha}", {"recursive": 1}
+        )
+        return data if status == 200 else {}